@@ -27,14 +27,22 @@
 #########################################################################################################################################
 
 import os
-from os import access, R_OK
-from os.path import isfile
 import sys
+import types
+import functools
+import operator
+
+import atexit
+import queue
 
 import logging
 import logging.handlers
 
 import json
+try:
+    import orjson                               # optional, faster JSON parser
+except ImportError:
+    orjson = None
 
 import discord
 
@@ -57,7 +65,32 @@ log_stream_handler = logging.StreamHandler()
 log_stream_handler.setLevel(LOG_LEVEL)
 log_stream_handler.setFormatter(log_formatter)
 
-log_file_handler = logging.handlers.RotatingFileHandler(
+# LogFileHandler
+# A logging.handlers.RotatingFileHandler that only checks whether the log file is a regular file once a record would take the file over
+# it's maximum size. The base class performs this check (a stat() call) on every record, even though it only matters when the file is
+# about to be rolled over. This only exists for Python versions older than 3.12, where the standard library already checks the size
+# first.
+class LogFileHandler(logging.handlers.RotatingFileHandler):
+
+    # shouldRollover
+    # Determines if the log file should be rolled over before the record is written to it.
+    def shouldRollover(self, record):
+        if self.maxBytes <= 0:
+            return False
+        if self.stream is None:
+            self.stream = self._open()
+        self.stream.seek(0, 2)
+        position = self.stream.tell()
+        if not position:
+            return False # never rollover an empty file
+        message = "%s\n" % self.format(record)
+        if position + len(message) < self.maxBytes:
+            return False
+        # Never rollover anything other than regular files:
+        return os.path.isfile(self.baseFilename) or not os.path.exists(self.baseFilename)
+
+log_file_handler_type = LogFileHandler if sys.version_info < (3, 12) else logging.handlers.RotatingFileHandler
+log_file_handler = log_file_handler_type(
     filename=LOG_FILE_NAME,
     encoding=LOG_FILE_ENCODING,
     maxBytes=LOG_FILE_MAX_BYTES,
@@ -65,18 +98,29 @@ log_file_handler = logging.handlers.RotatingFileHandler(
 )
 log_file_handler.setFormatter(log_formatter)
 
-def configure_logger(logger_name):
-    global log_stream_handler
-    global log_file_handler
+# Log records are pushed onto a queue by the logging calls and written to the stream and file handlers by a background thread, so
+# disk I/O never blocks the asyncio event loop:
+log_queue = queue.SimpleQueue()
+log_queue_handler = logging.handlers.QueueHandler(log_queue)
+log_queue_listener = logging.handlers.QueueListener(log_queue, log_stream_handler, log_file_handler, respect_handler_level=True)
+log_queue_listener.start()
+atexit.register(log_queue_listener.stop)
+
+# configure_logger
+# Configures a logger, or the root logger if no logger name is provided. Handlers are only attached to the root logger, every other
+# logger has it's level set and propagates records up to the root logger so that each record is only emitted once per handler.
+def configure_logger(logger_name=None):
     logger = logging.getLogger(logger_name)
     logger.setLevel(LOG_LEVEL)
-    for handler in logger.handlers:
+    if logger_name is not None:
+        logger.propagate = True
+        return logger
+    for handler in list(logger.handlers):
         logger.removeHandler(handler)
-    logger.addHandler(log_stream_handler)
-    logger.addHandler(log_file_handler)
+    logger.addHandler(log_queue_handler)
     return logger
 
-LOGGER = configure_logger("root")
+LOGGER = configure_logger()
 configure_logger("discord")
 configure_logger("discord.client")
 configure_logger("discord.gateway")
@@ -92,8 +136,9 @@ class LiveChatBot(discord.Client):
 
     # DEFAULT_INTENTS
     # Contains the default fallback intents for the a standard live chat bot. If any intents are not defined within the JSON
-    # configuration provided to the bot in it's constructor, their value is obtained from this constant table.
-    DEFAULT_INTENTS = {                         # Default Discord bot intents:
+    # configuration provided to the bot in it's constructor, their value is obtained from this constant table. This table is read-only
+    # since DEFAULT_INTENTS_VALUE is precomputed from it.
+    DEFAULT_INTENTS = types.MappingProxyType({  # Default Discord bot intents:
         "auto_moderation": False,               # Whether auto-moderation related events are enabled.
         "auto_moderation_configuration": False, # Whether auto-moderation configuration related events are enabled.
         "auto_moderation_execution": False,     # Whether auto-moderation execution related events are enabled.
@@ -127,63 +172,88 @@ class LiveChatBot(discord.Client):
         "voice_states": False,                  # Whether guild voice related states are enabled.
         "webhooks": True                        # Whether guild webhook related events are enabled. This is required for the live chat
                                                 # bot to manage webhooks.
-    }
+    })
 
     # __init__
     # Constructs a LiveChatBot instance from a JSON configuration object.
     def __init__(self, configuration):
-        if configuration == None:
-            raise ValueError("configuration is null.")
-        # Get bot API auth token:
-        auth = configuration.get("auth", "")
-        if auth == None or auth == "":
-            raise ValueError("No API authentication token was provided in the bot configuration.")
+        LiveChatBot.validate_configuration(configuration)
         # Get bot name and display name:
         self.name = configuration.get("name", "live_chat")
         self.display_name = configuration.get("display_name", "Live Chat")
         # Get bot intents and initialise super class:
-        intents = self.build_intents(configuration.get("intents", LiveChatBot.DEFAULT_INTENTS))
+        intents_configuration = configuration.get("intents")
+        if intents_configuration is None:
+            intents = DEFAULT_INTENTS_OBJECT
+        else:
+            intents = self.build_intents(intents_configuration)
         super().__init__(intents = intents)
-        LOGGER.info(f"[LiveChatBot] ({self.name}) instance created.")
+        LOGGER.info("[LiveChatBot] (%s) instance created.", self.name)
 
     # build_intents:
-    # Builds a discord.Intents object based off of the provided configuration.
+    # Builds a discord.Intents object based off of the provided configuration. If the configuration entry does not exist for an
+    # intent, it's value is obtained from the DEFAULT_INTENTS.
     def build_intents(self, configuration):
-        if configuration == None:
+        LiveChatBot.validate_intents(configuration)
+        value = DEFAULT_INTENTS_VALUE
+        for name, flag in INTENT_FLAG_ITEMS:
+            if name in configuration:
+                value = (value | flag) if configuration[name] else (value & ~flag)
+        intents = discord.Intents(value)
+        if LOGGER.isEnabledFor(logging.INFO):
+            for name, flag in INTENT_FLAG_ITEMS:
+                LOGGER.info("[LiveChatBot] (%s) intents.%s = `%s`.", self.name, name, (value & flag) == flag)
+        return intents
+
+    # validate_configuration:
+    # Validates a bot JSON configuration object. This is used by the constructor, and by the DiscordBotManager so that an invalid bot
+    # configuration can be reported before any LiveChatBot instances are created.
+    @staticmethod
+    def validate_configuration(configuration):
+        if configuration is None:
             raise ValueError("configuration is null.")
-        intents = discord.Intents()
-        intents.auto_moderation                 = self.get_intent(configuration, "auto_moderation")
-        intents.auto_moderation_configuration   = self.get_intent(configuration, "auto_moderation_configuration")
-        intents.auto_moderation_execution       = self.get_intent(configuration, "auto_moderation_execution")
-        intents.bans                            = self.get_intent(configuration, "bans")
-        intents.dm_messages                     = self.get_intent(configuration, "dm_messages")
-        intents.dm_reactions                    = self.get_intent(configuration, "dm_reactions")
-        intents.dm_typing                       = self.get_intent(configuration, "dm_typing")
-        intents.emojis_and_stickers             = self.get_intent(configuration, "emojis_and_stickers")
-        intents.guild_messages                  = self.get_intent(configuration, "guild_messages")
-        intents.guild_reactions                 = self.get_intent(configuration, "guild_reactions")
-        intents.guild_scheduled_events          = self.get_intent(configuration, "guild_scheduled_events")
-        intents.guild_typing                    = self.get_intent(configuration, "guild_typing")
-        intents.guilds                          = self.get_intent(configuration, "guilds")
-        intents.integrations                    = self.get_intent(configuration, "integrations")
-        intents.invites                         = self.get_intent(configuration, "invites")
-        intents.members                         = self.get_intent(configuration, "members")
-        intents.message_content                 = self.get_intent(configuration, "message_content")
-        intents.presences                       = self.get_intent(configuration, "presences")
-        intents.voice_states                    = self.get_intent(configuration, "voice_states")
-        intents.webhooks                        = self.get_intent(configuration, "webhooks")
-    
-    # get_intent
-    # Gets a single intent from a JSON configuration object. If the configuration entry does not exist for the intent, it's value is
-    # obtained from the DEFAULT_INTENTS
-    def get_intent(self, configuration, intent_name):
-        if configuration == None:
+        # Validate bot API auth token:
+        auth = configuration.get("auth", "")
+        if not auth:
+            raise ValueError("No API authentication token was provided in the bot configuration.")
+        # Validate bot intents:
+        intents = configuration.get("intents")
+        if intents is not None:
+            LiveChatBot.validate_intents(intents)
+
+    # validate_intents:
+    # Validates an intents JSON configuration object. Every intent defined within the configuration must be either true or false, this
+    # matches discord.py which refuses to set an intent to anything other than a bool.
+    @staticmethod
+    def validate_intents(configuration):
+        if configuration is None:
             raise ValueError("configuration is null.")
-        if intent_name == None:
-            raise ValueError("intent_name is null.")
-        intent = configuration.get(intent_name, LiveChatBot.DEFAULT_INTENTS[intent_name])
-        LOGGER.info(f"[LiveChatBot] ({self.name}) intents.{intent_name} = `{intent}`.")
-        return intent
+        if not isinstance(configuration, dict):
+            raise ValueError("intents configuration is not a JSON object.")
+        for name, _ in INTENT_FLAG_ITEMS:
+            if name in configuration and not isinstance(configuration[name], bool):
+                raise ValueError(f"intents.{name} must be either true or false.")
+
+# INTENT_FLAGS
+# Maps the name of each intent in LiveChatBot.DEFAULT_INTENTS to it's bit within a discord.Intents value.
+INTENT_FLAGS = { name: discord.Intents.VALID_FLAGS[name] for name in LiveChatBot.DEFAULT_INTENTS }
+
+# INTENT_FLAG_ITEMS
+# The (name, bit) pairs of INTENT_FLAGS, cached as a tuple so that building intents walks a single tuple.
+INTENT_FLAG_ITEMS = tuple(INTENT_FLAGS.items())
+
+# DEFAULT_INTENTS_VALUE
+# The discord.Intents value of LiveChatBot.DEFAULT_INTENTS, precomputed so that building intents only needs to flip the bits that are
+# overridden by a bot configuration. Some discord.Intents flags share bits, so the flags are combined with a bitwise OR.
+DEFAULT_INTENTS_VALUE = functools.reduce(
+    operator.or_,
+    (INTENT_FLAGS[name] for name, enabled in LiveChatBot.DEFAULT_INTENTS.items() if enabled),
+    0
+)
+
+# DEFAULT_INTENTS_OBJECT
+# A discord.Intents object built from DEFAULT_INTENTS_VALUE, shared by every bot whose configuration does not define any intents.
+DEFAULT_INTENTS_OBJECT = discord.Intents(DEFAULT_INTENTS_VALUE)
 
 #########################################################################################################################################
 # DISCORD SERVER OBJECT                                                                                                                 #
@@ -206,38 +276,35 @@ class DiscordBotManager:
     # the file is created and assigned to this instance to manage as a LiveChatBot instance.
     def __init__(self, configuration_path):
         # Validate configuration_path provided:
-        if configuration_path == None:
+        if configuration_path is None:
             raise ValueError("configuration_path is null.")
-        if not isfile(configuration_path):
-            raise IOError("configuration_path is not a file.")
-        if not access(configuration_path, R_OK):
-            raise IOError("configuration_path is not readable.")
+        try:
+            file = open(configuration_path, "rb")
+        except (FileNotFoundError, IsADirectoryError) as error:
+            raise IOError("configuration_path is not a file.") from error
+        except PermissionError as error:
+            raise IOError("configuration_path is not readable.") from error
         # Read JSON file:
-        file = open(configuration_path, "r")
-        json_data = json.load(file)
-        file.close()
+        with file:
+            data = file.read()
+        json_data = orjson.loads(data) if orjson is not None else json.loads(data)
         # Read address, port, and bots array:
         self.listen_address = json_data.get("address", "0.0.0.0")
         self.listen_port    = json_data.get("port", 8080)
         # Read bots array:
         bots_data = json_data.get("bots", [ ])
-        self.bots = []
-        # Iterate bots array:
-        if bots_data != None and len(bots_data) > 0:
-            for bot in bots_data:
-                self.bots.append(LiveChatBot(bot))
+        if bots_data is None:
+            bots_data = []
+        # Validate every bot before any bot is created:
+        for bot in bots_data:
+            LiveChatBot.validate_configuration(bot)
+        # Create a LiveChatBot instance for each bot:
+        self.bots = [LiveChatBot(bot) for bot in bots_data]
         # Report total number of bots:
-        LOGGER.info(f"[DiscordBotManager] {len(self.bots)} LiveChatBot instances created.")
+        LOGGER.info("[DiscordBotManager] %s LiveChatBot instances created.", len(self.bots))
 
-# Read arguments passed into program:
-arguments = sys.argv[1:]
-arguments_count = len(arguments)
 # Read configuration directory path (expected 1st argument):
-if arguments_count >= 1:
-    configuration_directory_path = arguments[0]
-else:
-    configuration_directory_path = os.path.realpath(".")
-configuration_directory_path = os.path.join(configuration_directory_path, "")
+configuration_directory_path = sys.argv[1] if len(sys.argv) > 1 else "."
 # Create DiscordBotManager instance:
 DISCORD_CONFIGURATION_PATH = os.path.join(configuration_directory_path, "configuration.json")
 DISCORD_BOT_MANAGER = DiscordBotManager(DISCORD_CONFIGURATION_PATH)
\ No newline at end of file